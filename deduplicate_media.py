@@ -19,37 +19,103 @@ Behavior:
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
 import json
+import mmap
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass
 from pathlib import Path
 from shutil import get_terminal_size
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speedup
+    _loads = json.loads
+
+try:
+    import blake3
+    HASH_NAME = "blake3"
+    new_hash = blake3.blake3
+except ImportError:  # optional speedup
+    HASH_NAME = "sha256"
+    new_hash = hashlib.sha256
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 
 MEDIA_EXTS = {
     ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".tif", ".tiff",
     ".mp4", ".mov", ".m4v", ".avi", ".mkv", ".3gp", ".mts",
 }
+_MEDIA_EXT_TUPLE = tuple(MEDIA_EXTS)  # for str.endswith
 
 SUPPLEMENTAL_SUFFIX = ".supplemental-metadata.json"
 
+# hashlib releases the GIL while hashing, so threads overlap disk reads and hashing
+HASH_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+# Same-size files are compared block by block in lockstep. The first block is
+# small so that files which differ early are split off after a short read.
+PREFIX_BYTES = 64 * 1024
+BLOCK_SIZE = 1024 * 1024
+
+# Files at least this large are memory-mapped instead of read into buffers
+MMAP_MIN_BYTES = 8 * 1024 * 1024
+
+
+def _max_open_files() -> int:
+    if resource is None:
+        return 256
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        soft = 4096
+    # every worker may hold a full group open, and a memory-mapped file holds
+    # two descriptors (mmap dups the fd on POSIX); keep half the limit in reserve
+    return max(2, soft // (2 * 2 * HASH_WORKERS))
+
+
+MAX_OPEN_FILES = _max_open_files()
+
 
 @dataclass(frozen=True)
 class FileInfo:
     path: Path
     size: int
+    mtime: float
 
 
 class Progress:
+    # redraw at most this often; terminal width is re-read at most once a second
+    MIN_INTERVAL = 0.1
+    WIDTH_TTL = 1.0
+
     def __init__(self, total: int, root: Path):
         self.total = total
         self.root = root
         self.last_len = 0
+        self.last_draw = 0.0
+        self.width = 0
+        self.width_at = 0.0
 
     def update(self, done: int, folder: Optional[Path]):
-        width = get_terminal_size((100, 20)).columns
+        now = time.monotonic()
+        if now - self.last_draw < self.MIN_INTERVAL and done < self.total:
+            return
+        self.last_draw = now
+        if now - self.width_at > self.WIDTH_TTL:
+            self.width = get_terminal_size((100, 20)).columns
+            self.width_at = now
+        width = self.width
         bar_width = max(10, min(40, width - 40))
         frac = 0 if self.total == 0 else min(1.0, done / self.total)
         filled = int(frac * bar_width)
@@ -74,81 +140,212 @@ class Progress:
         sys.stderr.flush()
 
 
-def is_media_file(p: Path) -> bool:
-    return p.is_file() and p.suffix.lower() in MEDIA_EXTS
-
-
 def iter_media_files(root: Path) -> Iterable[FileInfo]:
-    for p in root.rglob("*"):
-        if is_media_file(p):
-            try:
-                st = p.stat()
-            except OSError:
-                continue
-            yield FileInfo(p, st.st_size)
-
+    # os.scandir hands back file type (and on Windows, stat) from the directory
+    # listing itself, so non-media entries never cost an extra syscall
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                        continue
+                    if not e.is_file(follow_symlinks=False):
+                        continue
+                    if not e.name.lower().endswith(_MEDIA_EXT_TUPLE):
+                        continue
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                yield FileInfo(Path(e.path), st.st_size, st.st_mtime)
+
+
+def _fadvise(f, advice: str):
+    # Page-cache hints: read ahead while a file is being read, then drop its
+    # pages so a full Takeout sweep doesn't evict everything else.
+    # os.posix_fadvise is not available on Windows or macOS.
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, getattr(os, advice))
+        except OSError:
+            pass
 
-def sha256_file(path: Path, buf_size: int = 1024 * 1024) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        while chunk := f.read(buf_size):
-            h.update(chunk)
-    return h.hexdigest()
 
+def _map_file(f) -> mmap.mmap:
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):  # not on Windows
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
 
-def quick_hash(path: Path, size: int) -> str:
-    h = hashlib.sha256()
-    h.update(str(size).encode())
-    with path.open("rb") as f:
-        h.update(f.read(64 * 1024))
-        if size > 64 * 1024:
-            f.seek(max(0, size - 64 * 1024))
-            h.update(f.read(64 * 1024))
-    return h.hexdigest()
 
+class BlockReader:
+    """Reads a file front to back in blocks; large files are memory-mapped."""
 
+    def __init__(self, path: Path, size: int):
+        self.f = path.open("rb")
+        _fadvise(self.f, "POSIX_FADV_SEQUENTIAL")
+        self.mm = None
+        self.view = None
+        self.pos = 0
+        if size >= MMAP_MIN_BYTES:
+            try:
+                self.mm = _map_file(self.f)
+            except (OSError, ValueError):
+                self.mm = None
+            else:
+                self.view = memoryview(self.mm)
+
+    def read(self, n: int):
+        if self.view is None:
+            return self.f.read(n)
+        block = self.view[self.pos:self.pos + n]
+        self.pos += len(block)
+        return block
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.mm.close()
+            self.view = None
+        if not self.f.closed:
+            # after the map is gone, so its pages can actually be dropped
+            _fadvise(self.f, "POSIX_FADV_DONTNEED")
+            self.f.close()
+
+
+def hash_file(path: Path) -> str:
+    with path.open("rb", buffering=0) as f:
+        _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+        try:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+                try:
+                    mm = _map_file(f)
+                except (OSError, ValueError):
+                    mm = None  # e.g. network mounts, or too large for the address space
+                if mm is not None:
+                    # the hasher walks the mapping in one call, no chunk buffers
+                    with mm:
+                        h = new_hash()
+                        h.update(mm)
+                        return h.hexdigest()
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                return hashlib.file_digest(f, new_hash).hexdigest()
+            h = new_hash()
+            while chunk := f.read(1024 * 1024):
+                h.update(chunk)
+            return h.hexdigest()
+        finally:
+            _fadvise(f, "POSIX_FADV_DONTNEED")
+
+
+def _hash_each(paths: List[Path]) -> List[Tuple[str, List[Path]]]:
+    by_hash: Dict[str, List[Path]] = {}
+    for p in paths:
+        try:
+            by_hash.setdefault(hash_file(p), []).append(p)
+        except OSError as e:
+            sys.stderr.write(f"\nSkipping unreadable file {p}: {e}\n")
+    return [(h, ps) for h, ps in by_hash.items() if len(ps) > 1]
+
+
+def find_identical(paths: List[Path], size: int) -> List[Tuple[str, List[Path]]]:
+    """
+    Split same-size files into sets of byte-identical files.
+
+    All files are read in lockstep, one block at a time, and the group is
+    split as soon as contents diverge. Each file is read at most once, and
+    only up to the block where it stops matching every other file.
+    """
+    if len(paths) > MAX_OPEN_FILES:
+        # too many to keep open at once: fall back to hashing one file at a time
+        return _hash_each(paths)
+
+    with ExitStack() as stack:
+        group = []
+        for p in paths:
+            try:
+                reader = BlockReader(p, size)
+            except OSError:
+                # e.g. out of descriptors: release ours and hash one at a time,
+                # which also reports files that really can't be read
+                stack.close()
+                return _hash_each(paths)
+            stack.callback(reader.close)
+            group.append((p, reader, new_hash()))
+
+        # running digests cover the whole prefix read so far, so equal digests
+        # mean equal contents up to the current offset
+        groups = [group] if len(group) > 1 else []
+        offset = 0
+        while groups and offset < size:
+            n = PREFIX_BYTES if offset == 0 else BLOCK_SIZE
+            split = []
+            for group in groups:
+                buckets: Dict[bytes, list] = {}
+                for member in group:
+                    _, reader, h = member
+                    try:
+                        h.update(reader.read(n))
+                    except OSError as e:
+                        sys.stderr.write(f"\nSkipping unreadable file {member[0]}: {e}\n")
+                        reader.close()
+                        continue
+                    buckets.setdefault(h.digest(), []).append(member)
+                for same in buckets.values():
+                    if len(same) > 1:
+                        split.append(same)
+                    else:
+                        same[0][1].close()
+            groups = split
+            offset += n
+
+        return [(g[0][2].hexdigest(), [p for p, _, _ in g]) for g in groups]
+
+
+@functools.lru_cache(maxsize=None)
 def is_album_folder(folder: Path) -> bool:
     meta = folder / "metadata.json"
     if not meta.is_file():
         return False
     try:
-        obj = json.loads(meta.read_text(encoding="utf-8"))
+        obj = _loads(meta.read_bytes())
     except Exception:
         return False
     return isinstance(obj, dict) and isinstance(obj.get("title"), str) and obj["title"].strip()
 
 
+@functools.lru_cache(maxsize=4096)
+def _folder_json_index(folder: Path) -> Dict[str, List[Path]]:
+    # lowercased name -> paths; a list because case-sensitive filesystems can
+    # hold several spellings of the same sidecar name
+    index: Dict[str, List[Path]] = {}
+    try:
+        with os.scandir(folder) as it:
+            for e in it:
+                lower = e.name.lower()
+                if lower.endswith(".json"):
+                    index.setdefault(lower, []).append(Path(e.path))
+    except OSError:
+        pass
+    return index
+
+
 def related_sidecars(media: Path) -> List[Path]:
-    folder = media.parent
-    name = media.name
-    lower = name.lower()
-
-    candidates = [
-        folder / (name + ".json"),
-        folder / (name + SUPPLEMENTAL_SUFFIX),
-    ]
-
-    for jp in folder.glob("*.json"):
-        j = jp.name.lower()
-        if j == lower + ".json" or j == lower + SUPPLEMENTAL_SUFFIX:
-            candidates.append(jp)
-
-    out, seen = [], set()
-    for p in candidates:
-        try:
-            rp = p.resolve()
-        except Exception:
-            rp = p
-        if p.exists() and rp not in seen:
-            seen.add(rp)
-            out.append(p)
-    return out
+    index = _folder_json_index(media.parent)
+    lower = media.name.lower()
+    return index.get(lower + ".json", []) + index.get(lower + SUPPLEMENTAL_SUFFIX, [])
 
 
 def pick_keeper(
     paths: List[Path],
     album_policy: str,
     default_policy: str,
+    mtimes: Dict[Path, float],
 ) -> Path:
     album = [p for p in paths if is_album_folder(p.parent)]
     non_album = [p for p in paths if not is_album_folder(p.parent)]
@@ -160,9 +357,9 @@ def pick_keeper(
             paths = non_album
 
     if default_policy == "oldest":
-        return min(paths, key=lambda p: p.stat().st_mtime)
+        return min(paths, key=lambda p: mtimes[p])
     if default_policy == "newest":
-        return max(paths, key=lambda p: p.stat().st_mtime)
+        return max(paths, key=lambda p: mtimes[p])
 
     # shortest path
     return min(paths, key=lambda p: (len(str(p)), str(p).lower()))
@@ -192,56 +389,47 @@ def main():
 
     files = list(iter_media_files(root))
     by_size: Dict[int, List[Path]] = {}
+    mtimes: Dict[Path, float] = {}
     for fi in files:
         by_size.setdefault(fi.size, []).append(fi.path)
+        mtimes[fi.path] = fi.mtime
 
-    size_groups = [ps for ps in by_size.values() if len(ps) > 1]
+    sizes = [size for size, ps in by_size.items() if len(ps) > 1]
+    size_groups = [by_size[size] for size in sizes]
     candidates = [p for ps in size_groups for p in ps]
 
     prog = Progress(len(candidates), root)
-    by_qh: Dict[str, List[Path]] = {}
+    by_hash: Dict[str, List[Path]] = {}
     done = 0
-    for ps in size_groups:
-        size = ps[0].stat().st_size
-        for p in ps:
-            done += 1
-            prog.update(done, p.parent)
-            try:
-                qh = quick_hash(p, size)
-            except OSError:
-                continue
-            by_qh.setdefault((size, qh), []).append(p)
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as ex:
+        for ps, found in zip(size_groups, ex.map(find_identical, size_groups, sizes)):
+            done += len(ps)
+            prog.update(done, ps[-1].parent)
+            for h, same in found:
+                by_hash[h] = same
     prog.done()
 
-    by_hash: Dict[str, List[Path]] = {}
-    for ps in by_qh.values():
-        if len(ps) < 2:
-            continue
-        for p in ps:
-            h = sha256_file(p)
-            by_hash.setdefault(h, []).append(p)
-
-    dup_sets = [ps for ps in by_hash.values() if len(ps) > 1]
+    dup_sets_with_keeper: List[Tuple[Path, List[Path]]] = []
 
     with Path(args.report).open("w", encoding="utf-8") as f:
-        f.write("sha256\tkeeper\tduplicate\n")
+        f.write(f"{HASH_NAME}\tkeeper\tduplicate\n")
         for h, ps in by_hash.items():
             if len(ps) < 2:
                 continue
-            keeper = pick_keeper(ps, args.album_policy, args.keep)
+            keeper = pick_keeper(ps, args.album_policy, args.keep, mtimes)
+            dup_sets_with_keeper.append((keeper, ps))
             for p in ps:
                 if p != keeper:
                     f.write(f"{h}\t{keeper}\t{p}\n")
 
     if not args.delete_duplicates:
-        print(f"Duplicate sets: {len(dup_sets)} (report only)")
+        print(f"Duplicate sets: {len(dup_sets_with_keeper)} (report only)")
         return
 
     deleted = 0
     sidecars = 0
 
-    for ps in dup_sets:
-        keeper = pick_keeper(ps, args.album_policy, args.keep)
+    for keeper, ps in dup_sets_with_keeper:
         for p in ps:
             if p == keeper:
                 continue
@@ -259,7 +447,7 @@ def main():
                         sidecars += 1
 
     print(
-        f"Done. duplicate_sets={len(dup_sets)}, "
+        f"Done. duplicate_sets={len(dup_sets_with_keeper)}, "
         f"deleted_files={deleted}, deleted_sidecars={sidecars}"
     )
 
@@ -5,13 +5,22 @@ import json
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from shutil import get_terminal_size
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speedup
+    _loads = json.loads
+
 MEDIA_EXTS = {
     ".jpg", ".jpeg", ".heic", ".png", ".gif", ".webp",
     ".mp4", ".mov", ".m4v", ".avi", ".3gp"
 }
+_MEDIA_EXT_TUPLE = tuple(MEDIA_EXTS)  # for str.endswith
 
 SUPPLEMENTAL_SUFFIX = ".supplemental-metadata.json"
 
@@ -24,6 +33,75 @@ def run(cmd, dry_run=False):
     return p.returncode, p.stdout, p.stderr
 
 
+class ExifTool:
+    """
+    One long-running exiftool process (-stay_open) fed commands over stdin.
+    Starting exiftool costs far more than the work done per file, so every
+    read and write goes through the same process.
+    """
+
+    def __init__(self):
+        self.proc = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            # file names arrive as UTF-8 argfile lines; without -charset,
+            # exiftool on Windows would decode them in the system code page
+            ["exiftool", "-stay_open", "True", "-@", "-",
+             "-common_args", "-charset", "filename=utf8"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="surrogateescape",
+        )
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.proc.stdin.write("-stay_open\nFalse\n")
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+
+    def run(self, cmd):
+        """Same contract as run(): takes a full exiftool command line."""
+        args = cmd[1:]
+        # the argument file holds one argument per line
+        if self.proc.poll() is not None or any("\n" in a or "\r" in a for a in args):
+            return run(cmd, dry_run=False)
+
+        try:
+            self.proc.stdin.write("\n".join(args + ["-echo4", "{ready:${status}}", "-execute"]) + "\n")
+            self.proc.stdin.flush()
+        except OSError:  # exiftool died since the poll() above
+            return run(cmd, dry_run=False)
+
+        out = []
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                return 1, "".join(out), "exiftool exited unexpectedly"
+            if line.rstrip("\r\n") == "{ready}":
+                break
+            out.append(line)
+
+        err = []
+        rc = 1
+        while True:
+            line = self.proc.stderr.readline()
+            if not line:
+                break
+            text = line.rstrip("\r\n")
+            if text.startswith("{ready:") and text.endswith("}"):
+                try:
+                    rc = int(text[7:-1])
+                except ValueError:
+                    # exiftool too old to expand ${status}
+                    rc = 1 if any(e.startswith("Error") for e in err) else 0
+                break
+            err.append(line)
+        return rc, "".join(out), "".join(err)
+
+
 def parse_ts(value):
     if value is None:
         return None
@@ -68,60 +146,96 @@ def set_file_mtime(path: Path, sec: int, dry_run=False):
     os.utime(path, (sec, sec))
 
 
-def list_media_in_dir(parent: Path):
-    media = {}
-    for p in parent.iterdir():
-        if p.is_file() and p.suffix.lower() in MEDIA_EXTS:
-            media[p.name.lower()] = p
-    return media
+def scan_tree(root: Path):
+    """
+    Walk root once. Returns the sidecar candidates (*.json files) and, per
+    folder, a lowercased-name -> path map of its media files.
+    """
+    json_files = []
+    folder_media = {}
+    stack = [str(root)]
+    while stack:
+        folder = stack.pop()
+        media = {}
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                            continue
+                        if e.name.endswith(".json"):
+                            if e.is_file():
+                                json_files.append(Path(e.path))
+                            continue
+                        lower = e.name.lower()
+                        if lower.endswith(_MEDIA_EXT_TUPLE) and e.is_file():
+                            media[lower] = Path(e.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if media:
+            folder_media[Path(folder)] = media
+    return json_files, folder_media
+
+
+def load_json(json_path: Path):
+    """Parsed JSON object, or None if the file can't be read or parsed."""
+    try:
+        return _loads(json_path.read_bytes())
+    except Exception:
+        return None
 
 
 def strip_known_json_wrappers(json_name: str) -> str:
+    lower = json_name.lower()
     # IMG_4166.HEIC.supplemental-metadata.json -> IMG_4166.HEIC
-    if json_name.lower().endswith(SUPPLEMENTAL_SUFFIX):
+    if lower.endswith(SUPPLEMENTAL_SUFFIX):
         return json_name[:-len(SUPPLEMENTAL_SUFFIX)]
     # IMG_1234.jpg.json -> IMG_1234.jpg
-    if json_name.lower().endswith(".json"):
+    if lower.endswith(".json"):
         return json_name[:-5]
     return json_name
 
 
 def candidate_names_from_json(json_path: Path, obj: dict):
-    jname = json_path.name
-    candidates = []
+    # Generator: find_media_for_json stops at the first hit, so later
+    # candidates are usually never built.
 
     # Strongest signal: "title" field (your examples show it consistently)
     title = obj.get("title")
     if isinstance(title, str) and title:
-        candidates.append(title)
+        yield title
 
     # Supplemental pattern
-    base = strip_known_json_wrappers(jname)
-    candidates.append(base)
+    base = strip_known_json_wrappers(json_path.name)
+    yield base
 
-    base_path = Path(base)
+    # same split as Path(base).stem / .suffix
+    dot = base.rfind(".")
+    if 0 < dot < len(base) - 1:
+        stem, ext = base[:dot], base[dot:]
+    else:
+        stem, ext = base, ""
 
     # If base has no extension, try common ones
-    if base_path.suffix == "":
-        for ext in MEDIA_EXTS:
-            candidates.append(base + ext)
+    if not ext:
+        for mext in MEDIA_EXTS:
+            yield base + mext
 
     # Handle UUID-ish numeric tail mismatch:
     # C...-000.json -> C...-0000.mov (and similar)
-    stem = base_path.stem
-    ext = base_path.suffix
     for zeros in ("0", "00"):
         if ext:
-            candidates.append(f"{stem}{zeros}{ext}")
+            yield f"{stem}{zeros}{ext}"
         else:
             for mext in MEDIA_EXTS:
-                candidates.append(f"{stem}{zeros}{mext}")
-
-    return candidates
+                yield f"{stem}{zeros}{mext}"
 
 
-def find_media_for_json(json_path: Path, obj: dict) -> Path | None:
-    media_lookup = list_media_in_dir(json_path.parent)
+def find_media_for_json(json_path: Path, obj: dict, folder_media: dict) -> Path | None:
+    media_lookup = folder_media.get(json_path.parent, {})
     for name in candidate_names_from_json(json_path, obj):
         hit = media_lookup.get(name.lower())
         if hit:
@@ -129,7 +243,7 @@ def find_media_for_json(json_path: Path, obj: dict) -> Path | None:
     return None
 
 
-def exiftool_read_json(media_path: Path):
+def exiftool_read_json(media_path: Path, et: ExifTool):
     """
     Read key fields from the file using exiftool JSON output.
     We avoid parsing human-readable exiftool output.
@@ -142,7 +256,7 @@ def exiftool_read_json(media_path: Path):
         "-Description", "-ImageDescription", "-Caption-Abstract",
         str(media_path)
     ]
-    rc, out, err = run(cmd, dry_run=False)
+    rc, out, err = et.run(cmd)
     if rc != 0 or not out.strip():
         return None
     try:
@@ -237,13 +351,26 @@ def build_write_cmd(media_path: Path, dt_str: str | None, geo, desc: str | None,
 
 
 class Progress:
+    # redraw at most this often; terminal width is re-read at most once a second
+    MIN_INTERVAL = 0.1
+    WIDTH_TTL = 1.0
+
     def __init__(self, total: int, root: Path):
         self.total = max(0, int(total))
         self.root = root
         self.last_len = 0
-
-    def _bar(self, done: int):
-        width = get_terminal_size((100, 20)).columns
+        self.last_draw = 0.0
+        self.width = 0
+        self.width_at = 0.0
+
+    def _columns(self, now: float):
+        if now - self.width_at > self.WIDTH_TTL:
+            self.width = get_terminal_size((100, 20)).columns
+            self.width_at = now
+        return self.width
+
+    def _bar(self, done: int, now: float):
+        width = self._columns(now)
         # reserve space for text around the bar
         # " 9999/9999 100% |[.....]| folder"
         bar_width = max(10, min(40, width - 40))
@@ -254,8 +381,12 @@ class Progress:
         filled = int(round(frac * bar_width))
         return "█" * filled + "░" * (bar_width - filled), int(round(frac * 100))
 
-    def update(self, done: int, current_folder: Path | None):
-        bar, pct = self._bar(done)
+    def update(self, done: int, current_folder: Path | None, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_draw < self.MIN_INTERVAL and done < self.total:
+            return
+        self.last_draw = now
+        bar, pct = self._bar(done, now)
         folder_str = ""
         if current_folder is not None:
             try:
@@ -290,7 +421,8 @@ def main():
     root = Path(args.root).resolve()
     use_utc = not args.local_time
 
-    json_files = sorted(root.rglob("*.json"))
+    json_files, folder_media = scan_tree(root)
+    json_files.sort()
     if not json_files:
         print("No JSON files found under:", root)
         return
@@ -304,10 +436,13 @@ def main():
     skipped_no_match = 0
     skipped_no_ts = 0
 
-    for jp in json_files:
-        try:
-            obj = json.loads(jp.read_text(encoding="utf-8"))
-        except Exception:
+    # Reading and parsing run in threads; matching stays sequential because
+    # seen_media depends on order.
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        loaded = list(ex.map(load_json, json_files))
+
+    for jp, obj in zip(json_files, loaded):
+        if obj is None:
             skipped_unreadable += 1
             continue
 
@@ -315,7 +450,7 @@ def main():
             skipped_not_sidecar += 1
             continue
 
-        media = find_media_for_json(jp, obj)
+        media = find_media_for_json(jp, obj, folder_media)
         if not media:
             skipped_no_match += 1
             continue
@@ -349,84 +484,85 @@ def main():
 
     last_folder = None
 
-    for (jp, media, obj, ts) in jobs:
-        checked += 1
-        current_folder = media.parent
-        # Update progress every file; it includes the current folder
-        prog.update(checked, current_folder)
+    with ExifTool() as et:
+        for (jp, media, obj, ts) in jobs:
+            checked += 1
+            current_folder = media.parent
+            # Update progress every file; it includes the current folder
+            prog.update(checked, current_folder)
 
-        target_dt_str = ts_to_exif_datetime(ts, use_utc=use_utc)
-        target_dt = dt.datetime.fromtimestamp(ts, tz=dt.timezone.utc)
+            target_dt_str = ts_to_exif_datetime(ts, use_utc=use_utc)
+            target_dt = dt.datetime.fromtimestamp(ts, tz=dt.timezone.utc)
 
-        geo = pick_geo(obj)
-        desc = obj.get("description")
-        if isinstance(desc, str) and not desc.strip():
-            desc = None
+            geo = pick_geo(obj)
+            desc = obj.get("description")
+            if isinstance(desc, str) and not desc.strip():
+                desc = None
 
-        exif = exiftool_read_json(media)
-        existing_dt = pick_existing_time(exif)  # stored as UTC in our parser
-        need_time = False
-        need_gps = False
-        need_desc = False
+            exif = exiftool_read_json(media, et)
+            existing_dt = pick_existing_time(exif)  # stored as UTC in our parser
+            need_time = False
+            need_gps = False
+            need_desc = False
 
-        if args.force_time:
-            need_time = True
-        else:
-            if existing_dt is None:
+            if args.force_time:
                 need_time = True
             else:
-                diff = abs((existing_dt - target_dt).total_seconds())
-                if diff > args.time_threshold_seconds:
+                if existing_dt is None:
                     need_time = True
+                else:
+                    diff = abs((existing_dt - target_dt).total_seconds())
+                    if diff > args.time_threshold_seconds:
+                        need_time = True
 
-        if geo:
-            if args.force_gps:
-                need_gps = True
-            else:
-                if gps_is_missing_or_zero(exif):
+            if geo:
+                if args.force_gps:
                     need_gps = True
+                else:
+                    if gps_is_missing_or_zero(exif):
+                        need_gps = True
 
-        if desc:
-            if args.force_desc:
-                need_desc = True
-            else:
-                if text_is_empty(exif):
+            if desc:
+                if args.force_desc:
                     need_desc = True
-
-        if not (need_time or need_gps or need_desc):
-            no_change_needed += 1
-            continue
-
-        cmd = build_write_cmd(
-            media_path=media,
-            dt_str=target_dt_str if need_time else None,
-            geo=geo if need_gps else None,
-            desc=desc if need_desc else None,
-            use_utc=use_utc
-        )
-
-        if args.dry_run:
-            # Keep progress line intact: print a newline before details
-            sys.stderr.write("\n")
-            print(f"Would update: {media}")
-            if need_time:
-                print(f"  time -> {target_dt_str}")
-            if need_gps:
-                print(f"  gps  -> {geo}")
-            if need_desc:
-                print(f"  desc -> (non-empty)")
-            run(cmd, dry_run=True)
-            # Re-draw progress line after verbose output
-            prog.update(checked, current_folder)
-            continue
-
-        rc, out, err = run(cmd, dry_run=False)
-        if rc == 0:
-            updated += 1
-            if args.touch and need_time:
-                set_file_mtime(media, ts, dry_run=False)
-        else:
-            failed_write += 1
+                else:
+                    if text_is_empty(exif):
+                        need_desc = True
+
+            if not (need_time or need_gps or need_desc):
+                no_change_needed += 1
+                continue
+
+            cmd = build_write_cmd(
+                media_path=media,
+                dt_str=target_dt_str if need_time else None,
+                geo=geo if need_gps else None,
+                desc=desc if need_desc else None,
+                use_utc=use_utc
+            )
+
+            if args.dry_run:
+                # Keep progress line intact: print a newline before details
+                sys.stderr.write("\n")
+                print(f"Would update: {media}")
+                if need_time:
+                    print(f"  time -> {target_dt_str}")
+                if need_gps:
+                    print(f"  gps  -> {geo}")
+                if need_desc:
+                    print(f"  desc -> (non-empty)")
+                run(cmd, dry_run=True)
+                # Re-draw progress line after verbose output
+                prog.update(checked, current_folder, force=True)
+                continue
+
+            rc, out, err = et.run(cmd)
+            if rc == 0:
+                updated += 1
+                if args.touch and need_time:
+                    set_file_mtime(media, ts, dry_run=False)
+            else:
+                failed_write += 1
 
     prog.done()
     print(